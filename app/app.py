@@ -1,14 +1,48 @@
+from bisect import bisect_right
 import streamlit as st
-from styles import inject_custom_css, create_animated_metric, create_feature_explanation
-from utils import validate_inputs, load_model, load_enhanced_dataset, predict_game_score, get_popular_options, get_valid_example_values
+from styles import inject_custom_css, create_feature_explanation
+from utils import validate_inputs, load_model, load_enhanced_dataset, predict_game_score, get_popular_options, get_valid_example_values, compute_insights, get_option_positions, get_option_sets, get_lowered_options, get_plotly, precompute_examples, EXAMPLES
 
-# Try to import plotly, but don't fail if not available
-try:
-    import plotly.graph_objects as go
-    import plotly.express as px
-    PLOTLY_AVAILABLE = True
-except ImportError:
-    PLOTLY_AVAILABLE = False
+# Score buckets: a score at or above a threshold falls into the next bucket
+_SCORE_THRESHOLDS = (5.0, 7.0, 8.5)
+# Per bucket: category label, card color, card background, message function, message
+_SCORE_CATEGORIES = (
+    ("👎 Poor", "#dc3545", "#f8d7da", st.error, "👎 **Poor reception predicted.** Users might not enjoy this game."),
+    ("⚠️ Mixed", "#ffc107", "#fff3cd", st.warning, "⚠️ **Mixed reviews expected.** Some will like it, others won't."),
+    ("👍 Good", "#17a2b8", "#d1ecf1", st.info, "👍 **Good!** Users will likely enjoy this game."),
+    ("🌟 Exceptional", "#28a745", "#d4edda", st.success, "🌟 **Exceptional!** This game is predicted to be loved by users!"),
+)
+
+# HTML result cards; only the numbers and category fields are substituted per prediction
+_SCORE_CARD_TMPL = """
+<div style="text-align: center; padding: 2rem; background: linear-gradient(135deg, #6c757d 0%, #495057 100%); border-radius: 15px; color: white;">
+    <h3>Predicted Score</h3>
+    <h1 style="font-size: 4rem; margin: 1rem 0;">{score:.2f}</h1>
+    <p>out of 10</p>
+</div>
+"""
+_PCT_CARD_TMPL = """
+<div style="text-align: center; padding: 2rem; background: white; border-radius: 15px; box-shadow: 0 5px 15px rgba(0,0,0,0.1); border-left: 6px solid #6c757d;">
+    <h3 style="color: #495057; margin-bottom: 1rem;">📊 Score Percentage</h3>
+    <h1 style="color: #6c757d; font-size: 3.5rem; margin: 1rem 0;">{pct:.1f}%</h1>
+    <p style="color: #666; font-size: 1.1rem;">
+        {sign}{delta:.1f}% vs Average
+    </p>
+</div>
+"""
+_CATEGORY_CARD_TMPL = """
+<div style="text-align: center; padding: 2rem; background: {bg}; border-radius: 15px; box-shadow: 0 5px 15px rgba(0,0,0,0.1); border-left: 6px solid {color};">
+    <h3 style="color: #495057; margin-bottom: 1rem;">🎯 Category</h3>
+    <h2 style="color: {color}; font-size: 2.5rem; margin: 1rem 0;">{category}</h2>
+    <p style="color: #666; font-size: 1.1rem;">Quality Rating</p>
+</div>
+"""
+
+# Month labels indexed by month number (index 0 is unused)
+_MONTH_NAMES = (
+    "", "January", "February", "March", "April", "May", "June",
+    "July", "August", "September", "October", "November", "December"
+)
 
 # Configure page settings
 st.set_page_config(
@@ -18,18 +52,15 @@ st.set_page_config(
     initial_sidebar_state="collapsed"
 )
 
-def create_score_gauge(score):
-    """Create a beautiful gauge chart for the prediction score"""
-    if not PLOTLY_AVAILABLE:
-        return None
-        
-    fig = go.Figure(go.Indicator( # type: ignore
-        mode = "gauge+number+delta",
-        value = score,
-        domain = {'x': [0, 1], 'y': [0, 1]},
-        title = {'text': "Predicted User Score", 'font': {'size': 26, 'color': 'white'}},
-        delta = {'reference': 7.0, 'increasing': {'color': "green"}, 'decreasing': {'color': "red"}},
-        gauge = {
+# Static parts of the score gauge; only the value changes between predictions
+_GAUGE_TEMPLATE = {
+    'data': [{
+        'type': "indicator",
+        'mode': "gauge+number+delta",
+        'domain': {'x': [0, 1], 'y': [0, 1]},
+        'title': {'text': "Predicted User Score", 'font': {'size': 26, 'color': 'white'}},
+        'delta': {'reference': 7.0, 'increasing': {'color': "green"}, 'decreasing': {'color': "red"}},
+        'gauge': {
             'axis': {'range': [None, 10], 'tickwidth': 1, 'tickcolor': "darkblue"},
             'bar': {'color': "darkblue"},
             'bgcolor': "white",
@@ -42,16 +73,46 @@ def create_score_gauge(score):
                 {'range': [8.5, 10], 'color': '#44ff44'}
             ]
         }
-    ))
-    
-    fig.update_layout(
-        paper_bgcolor="rgba(0,0,0,0)",
-        plot_bgcolor="rgba(0,0,0,0)",
-        font={'color': "white", 'family': "Arial"},
-        height=500
-    )
+    }],
+    'layout': {
+        'paper_bgcolor': "rgba(0,0,0,0)",
+        'plot_bgcolor': "rgba(0,0,0,0)",
+        'font': {'color': "white", 'family': "Arial"},
+        'height': 500
+    }
+}
+
+def create_score_gauge(score):
+    """Create a beautiful gauge chart for the prediction score"""
+    go = get_plotly()
+    if go is None:
+        return None
     
-    return fig
+    # go.Figure copies its input, so the shared template is never mutated
+    fig_dict = {
+        'data': [dict(_GAUGE_TEMPLATE['data'][0], value=score)],
+        'layout': _GAUGE_TEMPLATE['layout']
+    }
+    # Built once per rounded score (see _cached_score_gauge), so the validation cost is rarely paid
+    return go.Figure(fig_dict, skip_invalid=True)
+
+def render_fallback_score(score):
+    """Large score card with a progress bar, used when the gauge can't be drawn"""
+    st.markdown(_SCORE_CARD_TMPL.format(score=score), unsafe_allow_html=True)
+    st.progress(score / 10)
+
+def score_bucket_index(score):
+    """Index of the score bucket (Poor, Mixed, Good, Exceptional) for a prediction"""
+    return bisect_right(_SCORE_THRESHOLDS, score)
+
+@st.cache_resource(max_entries=128, show_spinner=False)
+def _cached_score_gauge(score_rounded):
+    # Shared across sessions and never mutated after construction
+    return create_score_gauge(score_rounded)
+
+def get_score_gauge(score):
+    """Gauge figure for a prediction, reused for any score that rounds to the same 2 decimals"""
+    return _cached_score_gauge(round(float(score), 2))
 
 def show_data_insights(df):
     """Show interesting insights about the dataset"""
@@ -59,96 +120,62 @@ def show_data_insights(df):
         return
         
     st.subheader("📊 Dataset Insights")
+    insights = compute_insights(df)
     
     col1, col2, col3, col4 = st.columns(4)
     
     with col1:
-        st.metric("Total Games", len(df))
+        st.metric("Total Games", insights['total_games'])
     
     with col2:
-        st.metric("Average Score", f"{df['metascore'].mean():.1f}")
+        st.metric("Average Score", f"{insights['average_score']:.1f}")
     
     with col3:
-        st.metric("Unique Developers", df['developer'].nunique())
+        st.metric("Unique Developers", insights['unique_developers'])
     
     with col4:
-        st.metric("Platforms", df['platform'].nunique())
-
-def main():
-    # Inject custom CSS styles
-    inject_custom_css()
-    # else:
-    # # Fallback basic styling
-    # st.markdown("""
-    # <style>
-    # .main-header {
-    #     background: linear-gradient(90deg, #495057 0%, #6c757d 100%);
-    #     padding: 2rem;
-    #     border-radius: 15px;
-    #     text-align: center;
-    #     color: white;
-    #     margin-bottom: 2rem;
-    #     box-shadow: 0 10px 20px rgba(0,0,0,0.1);
-    # }
-    # .prediction-card {
-    #     background: linear-gradient(135deg, #6c757d 0%, #495057 100%);
-    #     padding: 2rem;
-    #     border-radius: 15px;
-    #     text-align: center;
-    #     color: white;
-    #     box-shadow: 0 10px 20px rgba(0,0,0,0.1);
-    # }
-    # </style>
-    # """, unsafe_allow_html=True)
+        st.metric("Platforms", insights['platforms'])
 
-    # Main header
-    st.markdown("""
-    <div class="main-header">
-        <h1>🎮 Metacritic Game Score Predictor</h1>
-        <p>Predict user scores for video games using advanced machine learning!</p>
-    </div>
-    """, unsafe_allow_html=True)
-
-    # Load data and model
-    df_enhanced = load_enhanced_dataset()
-    model = load_model()
+def render_prediction(prediction):
+    """Gauge, percentage and category cards plus the interpretation message"""
+    # Show prediction result - reorganized for better space usage
+    st.markdown("---")
+    st.subheader("🎯 Prediction Results")
     
-    if df_enhanced is None or model is None:
-        st.stop()
-
-    # Sidebar for additional info
-    with st.sidebar:
-        st.header("ℹ️ About This App")
-        st.markdown("""
-        This app uses machine learning to predict Metacritic user scores based on:
-        - **🎪 Metascore**: Professional critic score
-        - **📅 Release timing**: Month of release
-        - **👨‍💻 Developer**: Game development studio
-        - **🎮 Platform**: Gaming platform
-        - **🎭 Genre**: Game category
-        """)
+    # Create three columns for horizontal layout - better proportions
+    col_gauge, col_metrics, col_category = st.columns([0.6, 0.2, 0.2])
+    
+    # Ensure prediction is valid before proceeding
+    if prediction is not None and isinstance(prediction, (int, float)):
+        category, category_color, category_bg, show_message, message = _SCORE_CATEGORIES[score_bucket_index(prediction)]
         
-        # Show dataset insights
-        show_data_insights(df_enhanced)
+        with col_gauge:
+            # Show gauge chart if plotly is available
+            fig = get_score_gauge(prediction)
+            if fig is not None:
+                st.plotly_chart(fig, use_container_width=True)
+            else:
+                render_fallback_score(prediction)
         
-        st.markdown("---")
+        with col_metrics:
+            # Larger score percentage metric
+            score_percentage = (prediction / 10) * 100
+            score_delta = score_percentage - 70
+            delta_sign = "+" if score_delta > 0 else ""
+            st.markdown(_PCT_CARD_TMPL.format(pct=score_percentage, sign=delta_sign, delta=score_delta), unsafe_allow_html=True)
         
-        # Add feature explanation if custom styles are available
-        create_feature_explanation()
-
-        st.markdown("🔗 **Data Source**: Metacritic Reviews Dataset")
-        st.markdown("🤖 **Model**: Random Forest Regressor")
-
-    # Get options for dropdowns
-    developers, platforms, genres= get_popular_options(df_enhanced)
+        with col_category:
+            # Larger category display
+            st.markdown(_CATEGORY_CARD_TMPL.format(category=category, color=category_color, bg=category_bg), unsafe_allow_html=True)
+        
+        # Score interpretation below in a single row
+        show_message(message)
+    else:
+        st.error("❌ Invalid prediction result. Please try again.")
 
-    # Use full width layout
-    st.subheader("🎯 Game Information")
-    
-    # Show message if example was loaded
-    if st.session_state.get('example_features'):
-        st.success("🎮 Example values loaded! Modify as needed and click Predict.")
-    
+@st.fragment
+def prediction_fragment(df_enhanced, model, developers, platforms, genres):
+    """Prediction form and results; submitting reruns only this fragment"""
     # Input form with better styling - full width
     with st.form("prediction_form"):
         # Check if example features are available in session state
@@ -156,10 +183,20 @@ def main():
         
         # Validate example features against available options
         if raw_example_features:
-            example_features = get_valid_example_values(raw_example_features, developers, platforms, genres)
+            example_features = get_valid_example_values(raw_example_features, developers, platforms, genres, get_option_sets(df_enhanced), get_lowered_options(df_enhanced))
         else:
             example_features = {}
         
+        # Positions of each option, so example defaults resolve without list scans;
+        # without an example every selectbox starts at its first option
+        if example_features:
+            developer_positions, platform_positions, genre_positions = get_option_positions(df_enhanced)
+            developer_index = developer_positions.get(example_features['developer'], 0)
+            platform_index = platform_positions.get(example_features['platform'], 0)
+            genre_index = genre_positions.get(example_features['genre'], 0)
+        else:
+            developer_index = platform_index = genre_index = 0
+        
         # Create horizontal layout with more columns to use full width
         col1, col2, col3, col4, col5 = st.columns([1.2, 1, 1, 1, 1])
         
@@ -180,20 +217,10 @@ def main():
                 "📅 Release Month",
                 options=list(range(1, 13)),
                 index=month_index,
-                format_func=lambda x: {
-                    1: "January", 2: "February", 3: "March", 4: "April",
-                    5: "May", 6: "June", 7: "July", 8: "August",
-                    9: "September", 10: "October", 11: "November", 12: "December"
-                }[x]
+                format_func=_MONTH_NAMES.__getitem__
             )
         
         with col3:
-            # Get developer index from validated examples
-            example_developer = example_features.get('developer', '')
-            developer_index = 0
-            if example_developer and developers and example_developer in developers:
-                developer_index = developers.index(example_developer)
-            
             developer = st.selectbox(
                 "👨‍💻 Developer",
                 options=developers,
@@ -202,12 +229,6 @@ def main():
             )
         
         with col4:
-            # Get platform index from validated examples
-            example_platform = example_features.get('platform', '')
-            platform_index = 0
-            if example_platform and platforms and example_platform in platforms:
-                platform_index = platforms.index(example_platform)
-            
             platform = st.selectbox(
                 "🎮 Platform",
                 options=platforms,
@@ -216,12 +237,6 @@ def main():
             )
         
         with col5:
-            # Get genre index from validated examples
-            example_genre = example_features.get('genre', '')
-            genre_index = 0
-            if example_genre and genres and example_genre in genres:
-                genre_index = genres.index(example_genre)
-            
             genre = st.selectbox(
                 "🎭 Genre",
                 options=genres,
@@ -250,8 +265,9 @@ def main():
                 'genre': genre or "",
             }
             
-            # Validate inputs
-            errors = validate_inputs(features)
+            # The slider and selectboxes already bound every value, so only an
+            # empty selection (no options loaded) needs the full validation
+            errors = validate_inputs(features) if not (developer and platform and genre) else []
             
             if errors:
                 for error in errors:
@@ -264,135 +280,105 @@ def main():
                 if error:
                     st.error(f"❌ {error}")
                 else:
-                    # Show prediction result - reorganized for better space usage
-                    st.markdown("---")
-                    st.subheader("🎯 Prediction Results")
-                    
-                    # Create three columns for horizontal layout - better proportions
-                    col_gauge, col_metrics, col_category = st.columns([0.6, 0.2, 0.2])
-                    
-                    # Ensure prediction is valid before proceeding
-                    if prediction is not None and isinstance(prediction, (int, float)):
-                        with col_gauge:
-                            # Show gauge chart if plotly is available
-                            if PLOTLY_AVAILABLE:
-                                try:
-                                    fig = create_score_gauge(prediction)
-                                    if fig is not None:
-                                        st.plotly_chart(fig, use_container_width=True)
-                                    else:
-                                        # Fallback with larger score display
-                                        st.markdown(f"""
-                                        <div style="text-align: center; padding: 2rem; background: linear-gradient(135deg, #6c757d 0%, #495057 100%); border-radius: 15px; color: white;">
-                                            <h3>Predicted Score</h3>
-                                            <h1 style="font-size: 4rem; margin: 1rem 0;">{prediction:.2f}</h1>
-                                            <p>out of 10</p>
-                                        </div>
-                                        """, unsafe_allow_html=True)
-                                        st.progress(prediction / 10)
-                                except:
-                                    # Fallback with larger score display
-                                    st.markdown(f"""
-                                    <div style="text-align: center; padding: 2rem; background: linear-gradient(135deg, #6c757d 0%, #495057 100%); border-radius: 15px; color: white;">
-                                        <h3>Predicted Score</h3>
-                                        <h1 style="font-size: 4rem; margin: 1rem 0;">{prediction:.2f}</h1>
-                                        <p>out of 10</p>
-                                    </div>
-                                    """, unsafe_allow_html=True)
-                                    st.progress(prediction / 10)
-                            else:
-                                # Fallback with larger score display
-                                st.markdown(f"""
-                                <div style="text-align: center; padding: 2rem; background: linear-gradient(135deg, #6c757d 0%, #495057 100%); border-radius: 15px; color: white;">
-                                    <h3>Predicted Score</h3>
-                                    <h1 style="font-size: 4rem; margin: 1rem 0;">{prediction:.2f}</h1>
-                                    <p>out of 10</p>
-                                </div>
-                                """, unsafe_allow_html=True)
-                                st.progress(prediction / 10)
-                        
-                        with col_metrics:
-                            # Larger score percentage metric
-                            score_percentage = (prediction / 10) * 100
-                            st.markdown(f"""
-                            <div style="text-align: center; padding: 2rem; background: white; border-radius: 15px; box-shadow: 0 5px 15px rgba(0,0,0,0.1); border-left: 6px solid #6c757d;">
-                                <h3 style="color: #495057; margin-bottom: 1rem;">📊 Score Percentage</h3>
-                                <h1 style="color: #6c757d; font-size: 3.5rem; margin: 1rem 0;">{score_percentage:.1f}%</h1>
-                                <p style="color: #666; font-size: 1.1rem;">
-                                    {"+" if score_percentage > 70 else ""}{score_percentage - 70:.1f}% vs Average
-                                </p>
-                            </div>
-                            """, unsafe_allow_html=True)
-                        
-                        with col_category:
-                            # Larger category display
-                            if prediction >= 8.5:
-                                category = "🌟 Exceptional"
-                                category_color = "#28a745"
-                                category_bg = "#d4edda"
-                            elif prediction >= 7.0:
-                                category = "👍 Good"
-                                category_color = "#17a2b8"
-                                category_bg = "#d1ecf1"
-                            elif prediction >= 5.0:
-                                category = "⚠️ Mixed"
-                                category_color = "#ffc107"
-                                category_bg = "#fff3cd"
-                            else:
-                                category = "👎 Poor"
-                                category_color = "#dc3545"
-                                category_bg = "#f8d7da"
-                            
-                            st.markdown(f"""
-                            <div style="text-align: center; padding: 2rem; background: {category_bg}; border-radius: 15px; box-shadow: 0 5px 15px rgba(0,0,0,0.1); border-left: 6px solid {category_color};">
-                                <h3 style="color: #495057; margin-bottom: 1rem;">🎯 Category</h3>
-                                <h2 style="color: {category_color}; font-size: 2.5rem; margin: 1rem 0;">{category}</h2>
-                                <p style="color: #666; font-size: 1.1rem;">Quality Rating</p>
-                            </div>
-                            """, unsafe_allow_html=True)
-                        
-                        # Score interpretation below in a single row
-                        if prediction >= 8.5:
-                            st.success("🌟 **Exceptional!** This game is predicted to be loved by users!")
-                        elif prediction >= 7.0:
-                            st.info("👍 **Good!** Users will likely enjoy this game.")
-                        elif prediction >= 5.0:
-                            st.warning("⚠️ **Mixed reviews expected.** Some will like it, others won't.")
-                        else:
-                            st.error("👎 **Poor reception predicted.** Users might not enjoy this game.")
-                    else:
-                        st.error("❌ Invalid prediction result. Please try again.")
+                    render_prediction(prediction)
+
+def load_example(features):
+    """Button callback: runs before the rerun, so the form already sees the example"""
+    st.session_state.example_features = features
+
+def examples_section(model, df_enhanced):
+    """Example buttons with their precomputed scores"""
+    example_scores = precompute_examples(model, df_enhanced)
+    
+    cols = st.columns(len(EXAMPLES))
+    for i, example in enumerate(EXAMPLES):
+        with cols[i]:
+            if example_scores is not None:
+                st.caption(f"Predicted score: {example_scores[i]:.2f}")
+            st.button(f"🎮 {example['name']}", key=f"example_{i}", on_click=load_example, args=(example['features'],))
+
+def main():
+    # Inject custom CSS styles
+    inject_custom_css()
+    # else:
+    # # Fallback basic styling
+    # st.markdown("""
+    # <style>
+    # .main-header {
+    #     background: linear-gradient(90deg, #495057 0%, #6c757d 100%);
+    #     padding: 2rem;
+    #     border-radius: 15px;
+    #     text-align: center;
+    #     color: white;
+    #     margin-bottom: 2rem;
+    #     box-shadow: 0 10px 20px rgba(0,0,0,0.1);
+    # }
+    # .prediction-card {
+    #     background: linear-gradient(135deg, #6c757d 0%, #495057 100%);
+    #     padding: 2rem;
+    #     border-radius: 15px;
+    #     text-align: center;
+    #     color: white;
+    #     box-shadow: 0 10px 20px rgba(0,0,0,0.1);
+    # }
+    # </style>
+    # """, unsafe_allow_html=True)
+
+    # Main header
+    st.markdown("""
+    <div class="main-header">
+        <h1>🎮 Metacritic Game Score Predictor</h1>
+        <p>Predict user scores for video games using advanced machine learning!</p>
+    </div>
+    """, unsafe_allow_html=True)
+
+    # Load data and model
+    df_enhanced = load_enhanced_dataset()
+    model = load_model()
+    
+    if df_enhanced is None or model is None:
+        st.stop()
+
+    # Sidebar for additional info
+    with st.sidebar:
+        st.header("ℹ️ About This App")
+        st.markdown("""
+        This app uses machine learning to predict Metacritic user scores based on:
+        - **🎪 Metascore**: Professional critic score
+        - **📅 Release timing**: Month of release
+        - **👨‍💻 Developer**: Game development studio
+        - **🎮 Platform**: Gaming platform
+        - **🎭 Genre**: Game category
+        """)
+        
+        # Show dataset insights
+        show_data_insights(df_enhanced)
+        
+        st.markdown("---")
+        
+        # Add feature explanation if custom styles are available
+        create_feature_explanation()
+
+        st.markdown("🔗 **Data Source**: Metacritic Reviews Dataset")
+        st.markdown("🤖 **Model**: Random Forest Regressor")
+
+    # Get options for dropdowns
+    developers, platforms, genres= get_popular_options(df_enhanced)
+
+    # Use full width layout
+    st.subheader("🎯 Game Information")
+    
+    # Show message if example was loaded
+    if st.session_state.get('example_features'):
+        st.success("🎮 Example values loaded! Modify as needed and click Predict.")
+    
+    prediction_fragment(df_enhanced, model, developers, platforms, genres)
 
     # Show example predictions
     st.markdown("---")
     st.subheader("🎲 Try These Examples")
     
-    examples = [
-        {
-            "name": "Nintendo Switch Zelda Game",
-            "features": {"metascore": 95, "month": 11, "developer": "Nintendo", 
-                        "platform": "Nintendo Switch", "genre": "Open-World Action"}
-        },
-        {
-            "name": "PlayStation Action Game", 
-            "features": {"metascore": 85, "month": 6, "developer": "Sony", 
-                        "platform": "PlayStation 5", "genre": "Action"}
-        },
-        {
-            "name": "PC Strategy Game",
-            "features": {"metascore": 70, "month": 3, "developer": "Paradox Interactive", 
-                        "platform": "PC", "genre": "Strategy"}
-        }
-    ]
-    
-    cols = st.columns(len(examples))
-    for i, example in enumerate(examples):
-        with cols[i]:
-            if st.button(f"🎮 {example['name']}", key=f"example_{i}"):
-                # Set the example features in session state
-                st.session_state.example_features = example['features']
-                # Clear after setting to avoid persistence issues
-                st.rerun()
+    examples_section(model, df_enhanced)
 
 def test():
     """Test function for development"""
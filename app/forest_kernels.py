@@ -0,0 +1,19 @@
+"""
+Numba-compiled forest prediction for single feature rows
+"""
+
+from numba import njit
+
+@njit(cache=True)
+def predict_flat_forest(roots, feature, threshold, left, right, value, x):
+    # Same traversal and tree-order averaging as sklearn's forest predict
+    total = 0.0
+    for root in roots:
+        node = root
+        while left[node] != -1:
+            if x[feature[node]] <= threshold[node]:
+                node = left[node]
+            else:
+                node = right[node]
+        total += value[node]
+    return total / roots.shape[0]
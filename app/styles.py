@@ -2,12 +2,10 @@
 Custom styles and components for the Streamlit app
 """
 
+import re
 import streamlit as st
 
-def inject_custom_css():
-    """Inject custom CSS styles into the Streamlit app"""
-    st.markdown("""
-    <style>
+_CUSTOM_CSS = """
     /* Global styles */
     .stApp {
         background: linear-gradient(180deg, #1E2532 0%, #141820 100%);
@@ -121,6 +119,13 @@ def inject_custom_css():
         box-shadow: 0 5px 15px rgba(0,0,0,0.1);
     }
     
+    /* Feature explanation cards, two per row */
+    .feature-grid {
+        display: grid;
+        grid-template-columns: repeat(2, minmax(0, 1fr));
+        column-gap: 1rem;
+    }
+    
     /* Sidebar styling */
     .css-1d391kg {
         background: linear-gradient(180deg, #667eea 0%, #764ba2 100%);
@@ -222,46 +227,70 @@ def inject_custom_css():
             padding: 1rem;
         }
         
+        .feature-grid {
+            grid-template-columns: 1fr;
+        }
+        
         /* Stack form elements on mobile */
         .css-1kyxreq {
             flex-direction: column;
         }
     }
-    </style>
-    """, unsafe_allow_html=True)
+"""
+
+def minify_css(css):
+    """Strip comments and collapse whitespace in a CSS string"""
+    css = re.sub(r'/\*.*?\*/', '', css, flags=re.S)
+    css = re.sub(r'\s+', ' ', css)
+    return re.sub(r'\s*([{};,>])\s*', r'\1', css).strip()
+
+# Minified once at import rather than shipped indented on every rerun
+_CUSTOM_CSS_MIN = minify_css(_CUSTOM_CSS)
+
+def inject_custom_css():
+    """Inject custom CSS styles into the Streamlit app"""
+    # Not guarded per session: Streamlit removes any element a full rerun doesn't re-emit,
+    # so skipping this would strip the styles. Fragment reruns already skip it.
+    # st.html passes the style tag straight through, without the markdown renderer.
+    st.html(f"<style>{_CUSTOM_CSS_MIN}</style>")
+
+_METRIC_CARD_TMPL = (
+    '<div class="metric-card pulse-animation">'
+    '<h3 style="margin: 0; color: #333;">{icon} {label}</h3>'
+    '<h2 style="margin: 10px 0; color: #6c757d; font-size: 2rem;">{value}</h2>'
+    '</div>'
+)
+
+_INFO_CARD_TMPL = (
+    '<div class="info-card">'
+    '<h4 style="margin: 0 0 10px 0;">{icon} {title}</h4>'
+    '<p style="margin: 0; opacity: 0.9;">{content}</p>'
+    '</div>'
+)
 
 def create_animated_metric(label, value, icon="📊"):
     """Create an animated metric card"""
-    return f"""
-    <div class="metric-card pulse-animation">
-        <h3 style="margin: 0; color: #333;">{icon} {label}</h3>
-        <h2 style="margin: 10px 0; color: #6c757d; font-size: 2rem;">{value}</h2>
-    </div>
-    """
+    return _METRIC_CARD_TMPL.format(icon=icon, label=label, value=value)
 
 def create_info_card(title, content, icon="ℹ️"):
     """Create an information card"""
-    return f"""
-    <div class="info-card">
-        <h4 style="margin: 0 0 10px 0;">{icon} {title}</h4>
-        <p style="margin: 0; opacity: 0.9;">{content}</p>
-    </div>
-    """
+    return _INFO_CARD_TMPL.format(icon=icon, title=title, content=content)
+
+_FEATURES_INFO = {
+    "🎪 Metascore": "Professional critics' aggregate score (0-100). Higher scores typically correlate with better user reception.",
+    "📅 Release Month": "Launch timing affects user scores. Holiday releases (Nov-Dec) often perform differently.",
+    "👨‍💻 Developer": "Studio reputation and track record influence user expectations and ratings.",
+    "🎮 Platform": "Gaming platform affects audience and technical performance expectations.",
+    "🎭 Genre": "Game category influences user base and scoring patterns."
+}
+
+# The cards are static, so they are rendered to a single HTML block once
+_FEATURE_CARDS_HTML = '<div class="feature-grid">' + ''.join(
+    create_info_card(feature, explanation) for feature, explanation in _FEATURES_INFO.items()
+) + '</div>'
 
 def create_feature_explanation():
     """Create feature explanation cards"""
-    features_info = {
-        "🎪 Metascore": "Professional critics' aggregate score (0-100). Higher scores typically correlate with better user reception.",
-        "📅 Release Month": "Launch timing affects user scores. Holiday releases (Nov-Dec) often perform differently.",
-        "👨‍💻 Developer": "Studio reputation and track record influence user expectations and ratings.",
-        "🎮 Platform": "Gaming platform affects audience and technical performance expectations.",
-        "🎭 Genre": "Game category influences user base and scoring patterns."
-    }
-    
     st.markdown("### 🧠 How It Works")
     st.markdown("This AI model considers these key factors:")
-    
-    cols = st.columns(2)
-    for i, (feature, explanation) in enumerate(features_info.items()):
-        with cols[i % 2]:
-            st.markdown(create_info_card(feature, explanation), unsafe_allow_html=True)
\ No newline at end of file
+    st.html(_FEATURE_CARDS_HTML)
@@ -1,6 +1,13 @@
+import contextlib
+import functools
+import json
+import os
+import tempfile
+import warnings
+import weakref
 import streamlit as st
 import pandas as pd
-import joblib
+import numpy as np
 
 MANUFACTURERS = {
     'Nintendo': ['Nintendo 64', 'GameCube', 'Wii', 'Wii U', 'Nintendo Switch', 'Nintendo Switch 2', 'Game Boy Advance', 'DS', '3DS'],
@@ -12,102 +19,350 @@ MANUFACTURERS = {
     'PC': ['PC']
 }
 
+MODEL_OPTIONS_PATH = 'app/metacritic_model_options.json'
+DATASET_PATH = 'app/metacritic_dataset_features_enhanced.csv'
+DATASET_CACHE_PATH = 'app/metacritic_dataset_features_enhanced.feather'
+
+# String columns stored as pandas categoricals once the dataset is loaded
+CATEGORICAL_COLUMNS = ['developer', 'platform', 'genre', 'manufacturer']
+
+# Model features precomputed in the dataset, keyed by the column(s) they are averaged over;
+# platform_genre_encoded is looked up by (platform, genre) tuples instead of the joined string column
+FEATURE_LOOKUP_KEYS = {
+    'developer_avg_score': 'developer',
+    'platform_age': 'platform',
+    'platform_genre_encoded': ['platform', 'genre'],
+    'genre_encoded': 'genre',
+    'platform_encoded': 'platform',
+    'manufacturer_encoded': 'manufacturer',
+}
+
+# Order of the lookup features after the metascore, month and holiday columns
+LOOKUP_FEATURES = list(FEATURE_LOOKUP_KEYS) + ['genre_popularity']
+
+# Only the columns the app reads are loaded from the dataset
+DATASET_COLUMNS = CATEGORICAL_COLUMNS + ['metascore'] + list(FEATURE_LOOKUP_KEYS)
+
+# Parse-time dtypes: categoricals for strings, int16 for the small integer encodings.
+# Float features stay float64 so the lookup means match the training data exactly.
+DATASET_DTYPES = {col: 'category' for col in CATEGORICAL_COLUMNS}
+DATASET_DTYPES.update({col: 'int16' for col in ['platform_age', 'genre_encoded', 'platform_encoded', 'manufacturer_encoded']})
+
+# Inverted once so the manufacturer of a platform is a single dict lookup
+PLATFORM_TO_MANUFACTURER = {platform: manufacturer for manufacturer, platforms in MANUFACTURERS.items() for platform in platforms}
+
+# Example games offered below the prediction form
+EXAMPLES = [
+    {
+        "name": "Nintendo Switch Zelda Game",
+        "features": {"metascore": 95, "month": 11, "developer": "Nintendo", 
+                    "platform": "Nintendo Switch", "genre": "Open-World Action"}
+    },
+    {
+        "name": "PlayStation Action Game", 
+        "features": {"metascore": 85, "month": 6, "developer": "Sony", 
+                    "platform": "PlayStation 5", "genre": "Action"}
+    },
+    {
+        "name": "PC Strategy Game",
+        "features": {"metascore": 70, "month": 3, "developer": "Paradox Interactive", 
+                    "platform": "PC", "genre": "Strategy"}
+    }
+]
+
 def map_manufacturers(platform):
-    for manufacturer, platforms in MANUFACTURERS.items():
-        if platform in platforms:
-            return manufacturer
-    return 'Other'
+    return PLATFORM_TO_MANUFACTURER.get(platform, 'Other')
+
+# (field, check, message) rules applied in order by validate_inputs
+_VALIDATION_RULES = (
+    ('developer', lambda v: bool(v.strip()), "Developer name cannot be empty"),
+    ('platform', lambda v: bool(v.strip()), "Platform cannot be empty"),
+    ('genre', lambda v: bool(v.strip()), "Genre cannot be empty"),
+    ('metascore', lambda v: 0 <= v <= 100, "Metascore must be between 0 and 100"),
+    ('month', lambda v: 1 <= v <= 12, "Month must be between 1 and 12"),
+)
 
 def validate_inputs(features):
     """Validate user inputs and return error messages if any"""
-    errors = []
-    
-    if not features['developer'].strip():
-        errors.append("Developer name cannot be empty")
-    
-    if not features['platform'].strip():
-        errors.append("Platform cannot be empty")
-        
-    if not features['genre'].strip():
-        errors.append("Genre cannot be empty")
-    
-    if features['metascore'] < 0 or features['metascore'] > 100:
-        errors.append("Metascore must be between 0 and 100")
-    
-    if features['month'] < 1 or features['month'] > 12:
-        errors.append("Month must be between 1 and 12")
-    
-    return errors
+    return [message for field, check, message in _VALIDATION_RULES if not check(features[field])]
 
+@st.cache_resource
 def load_model():
     """Load the pre-trained model"""
     try:
-        model = joblib.load('app/metacritic_model.pkl')
+        # Imported here: only the model loader needs joblib
+        import joblib
+        
+        # Memory-mapping makes the pickle load cheaper; sklearn's trees still copy their
+        # node arrays into their own buffers, so the tree memory is not shared across workers
+        model = joblib.load('app/metacritic_model.pkl', mmap_mode='r')
         return model
     except Exception as e:
         st.error(f"Error loading model: {str(e)}")
         return None
     
+@st.cache_resource
+def load_model_options():
+    """Load the dropdown vocabulary saved next to the model during training"""
+    try:
+        with open(MODEL_OPTIONS_PATH, encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        # Older model exports have no sidecar; options are rebuilt from the dataset
+        return None
+
+# Reloaded hourly so an updated CSV is picked up; the derived tables are keyed on
+# the frame object (cache_per_object), so they are rebuilt for the new one
+@st.cache_resource(ttl="1h", show_spinner=False)
 def load_enhanced_dataset():
-    """Load the enhanced dataset with precomputed features"""
+    """Load the enhanced dataset with precomputed features (one shared frame; treat it as read-only)"""
     try:
-        df = pd.read_csv('app/metacritic_dataset_features_enhanced.csv')
+        # Reuse the Feather snapshot while it is newer than the source CSV
+        if os.path.exists(DATASET_CACHE_PATH) and os.path.getmtime(DATASET_CACHE_PATH) >= os.path.getmtime(DATASET_PATH):
+            try:
+                return pd.read_feather(DATASET_CACHE_PATH, columns=DATASET_COLUMNS)
+            except Exception:
+                # A truncated snapshot, or one missing newer columns, is rebuilt from the CSV
+                pass
+        
+        # Categories come out sorted, so they double as dropdown options
+        df = pd.read_csv(DATASET_PATH, usecols=DATASET_COLUMNS, dtype=DATASET_DTYPES, engine='pyarrow')
+        write_dataset_snapshot(df)
         return df
     except Exception as e:
         st.error(f"Error loading dataset: {str(e)}")
         return None
+
+def write_dataset_snapshot(df):
+    """Write the Feather snapshot through a temp file, so readers never see a partial one"""
+    try:
+        fd, tmp_path = tempfile.mkstemp(suffix='.feather', dir=os.path.dirname(DATASET_CACHE_PATH))
+        os.close(fd)
+    except OSError:
+        # Read-only deployments just keep parsing the CSV
+        return
+    try:
+        df.to_feather(tmp_path)
+        os.replace(tmp_path, DATASET_CACHE_PATH)
+    except Exception:
+        # The snapshot is only an optimization; a failed write never fails the load
+        with contextlib.suppress(OSError):
+            os.remove(tmp_path)
     
-def predict_game_score(game_data: dict, model, features_df):
+def cache_per_object(func):
+    """Memoize read-only results derived from a model or frame, keyed on the argument objects themselves"""
+    # st.cache_resource leaves underscore arguments out of its key and st.cache_data copies its
+    # results, so neither fits here. Entries are dropped when an argument is garbage collected,
+    # which lets a reloaded dataset or model get fresh results.
+    cache = {}
+    
+    @functools.wraps(func)
+    def wrapper(*args):
+        key = tuple(id(arg) for arg in args)
+        entry = cache.get(key)
+        if entry is not None:
+            return entry[1]
+        result = func(*args)
+        try:
+            refs = [weakref.ref(arg, lambda _, key=key: cache.pop(key, None)) for arg in args]
+        except TypeError:
+            # Arguments that can't be weakly referenced (such as None) are not cached
+            return result
+        cache[key] = (refs, result)
+        return result
+    
+    wrapper.clear = cache.clear
+    return wrapper
+
+@cache_per_object
+def build_flat_forest(model):
+    """Concatenate the forest's tree node arrays for the compiled single-row predictor"""
+    trees = [estimator.tree_ for estimator in model.estimators_]
+    offsets = np.cumsum([0] + [tree.node_count for tree in trees])
+    
+    # Child indices are shifted to the flat layout; leaves keep their -1 marker
+    def flat_children(children):
+        return np.concatenate([np.where(c == -1, -1, c + off) for c, off in zip(children, offsets)]).astype(np.int32)
+    
+    return (
+        offsets[:-1].astype(np.int32),
+        np.concatenate([tree.feature for tree in trees]).astype(np.int32),
+        np.concatenate([tree.threshold for tree in trees]),
+        flat_children([tree.children_left for tree in trees]),
+        flat_children([tree.children_right for tree in trees]),
+        np.concatenate([tree.value[:, 0, 0] for tree in trees]),
+    )
+
+@functools.cache
+def _get_kernels():
+    """Import the numba kernels on first use; returns None when numba isn't installed"""
+    # Deferred so the numba import and kernel load stay off the app's cold start
     try:
-        developer = game_data.get("developer", "").strip()
-        platform = game_data.get("platform", "").strip()
-        month = game_data.get("month", 1)
-        genre = game_data.get("genre", "").strip()
-        
-        # Create a copy to avoid modifying the original
-        processed_data = game_data.copy()
-        processed_data["metascore_scaled"] = processed_data["metascore"] / 10
-        processed_data["manufacturer"] = map_manufacturers(processed_data["platform"])
-        manufacturer = processed_data["manufacturer"]
-        processed_data.pop("metascore", None)
-        
-        # Calculate features with fallback values
-        developer_scores = features_df[features_df["developer"] == developer]["developer_avg_score"]
-        processed_data["developer_avg_score"] = developer_scores.mean() if not developer_scores.empty else features_df["developer_avg_score"].mean()
-        
-        platform_ages = features_df[features_df["platform"] == platform]["platform_age"]
-        processed_data["platform_age"] = platform_ages.mean() if not platform_ages.empty else features_df["platform_age"].mean()
-        
-        processed_data["is_holiday_release"] = 1 if month in [11, 12] else 0
-        
-        genre_counts = features_df['genre'].value_counts()
-        processed_data["genre_popularity"] = genre_counts.get(genre, genre_counts.mean())
-        
-        platform_genre_key = f"{platform}_{genre}"
-        platform_genre_encoded = features_df[features_df["platform_genre"] == platform_genre_key]["platform_genre_encoded"]
-        processed_data["platform_genre_encoded"] = platform_genre_encoded.mean() if not platform_genre_encoded.empty else features_df["platform_genre_encoded"].mean()
-        
-        genre_encoded = features_df[features_df["genre"] == genre]["genre_encoded"]
-        processed_data["genre_encoded"] = genre_encoded.mean() if not genre_encoded.empty else features_df["genre_encoded"].mean()
-        
-        platform_encoded = features_df[features_df["platform"] == platform]["platform_encoded"]
-        processed_data["platform_encoded"] = platform_encoded.mean() if not platform_encoded.empty else features_df["platform_encoded"].mean()
+        import forest_kernels
+    except ImportError:
+        return None
+    return forest_kernels
+
+@functools.cache
+def get_plotly():
+    """Import plotly on first use; returns None when it isn't installed"""
+    # Lives here rather than in app.py, which Streamlit re-executes on every rerun
+    try:
+        import plotly.graph_objects as go
+    except ImportError:
+        return None
+    try:
+        import orjson  # noqa: F401
+        # Serialize figures for st.plotly_chart with orjson instead of the stdlib encoder
+        import plotly.io as pio
+        pio.json.config.default_engine = 'orjson'
+    except ImportError:
+        pass
+    return go
+
+def predict_rows(model, rows):
+    """Run the model on a plain feature matrix, skipping the DataFrame round-trip"""
+    with warnings.catch_warnings():
+        # The forest was fit on a DataFrame; columns are already in feature_names_in_ order
+        warnings.filterwarnings('ignore', message='X does not have valid feature names')
+        return model.predict(rows)
+
+@functools.lru_cache(maxsize=4)
+def model_feature_order(model):
+    """The model's input columns as a tuple, read once per model object"""
+    return tuple(model.feature_names_in_)
+
+@cache_per_object
+def build_feature_lookup(df):
+    """Precompute per-value feature means so predictions are dict lookups, not dataframe scans"""
+    lookup = {
+        feature: df.groupby(key, observed=True)[feature].mean().to_dict()
+        for feature, key in FEATURE_LOOKUP_KEYS.items()
+    }
+    defaults = {feature: df[feature].mean() for feature in FEATURE_LOOKUP_KEYS}
+    
+    genre_counts = df['genre'].value_counts()
+    lookup['genre_popularity'] = genre_counts.to_dict()
+    defaults['genre_popularity'] = genre_counts.mean()
+    return lookup, defaults
+
+@functools.lru_cache(maxsize=4)
+def model_matrix_columns(model):
+    """Model column positions of metascore_scaled, month, is_holiday_release and each LOOKUP_FEATURES entry"""
+    order = model_feature_order(model)
+    return np.array([order.index(name) for name in ['metascore_scaled', 'month', 'is_holiday_release'] + LOOKUP_FEATURES], dtype=np.int64)
+
+def feature_lookup_keys(game_data: dict):
+    """The key each lookup feature is read with for this game"""
+    developer = game_data.get("developer", "").strip()
+    platform = game_data.get("platform", "").strip()
+    genre = game_data.get("genre", "").strip()
+    return {
+        "developer_avg_score": developer,
+        "platform_age": platform,
+        "genre_popularity": genre,
+        "platform_genre_encoded": (platform, genre),
+        "genre_encoded": genre,
+        "platform_encoded": platform,
+        "manufacturer_encoded": map_manufacturers(game_data["platform"]),
+    }
+
+def build_feature_row(game_data: dict, lookup, defaults, columns):
+    """Compute one game's float32 model row from already resolved lookup tables and columns"""
+    row = np.empty(columns.shape[0], dtype=np.float32)
+    # Write each feature straight into its model column; trees cast to float32 anyway
+    month = game_data.get("month", 1)
+    row[columns[0]] = game_data["metascore"] / 10
+    row[columns[1]] = month
+    row[columns[2]] = 1 if month in (11, 12) else 0
+    
+    # Look up features with fallback values
+    keys = feature_lookup_keys(game_data)
+    for column, feature in zip(columns[3:], LOOKUP_FEATURES):
+        row[column] = lookup[feature].get(keys[feature], defaults[feature])
+    return row
+
+def memoize_by_inputs(predict, maxsize=256):
+    """Wrap a single-game predictor in an LRU cache keyed on the input fields it reads"""
+    @functools.lru_cache(maxsize=maxsize)
+    def cached(developer, platform, genre, metascore, month):
+        return predict({"developer": developer, "platform": platform, "genre": genre, "metascore": metascore, "month": month})
+    
+    def predict_memoized(game_data):
+        return cached(game_data.get("developer", ""), game_data["platform"], game_data.get("genre", ""), game_data["metascore"], game_data.get("month", 1))
+    
+    return predict_memoized
+
+@cache_per_object
+def build_predictor(model, features_df):
+    """Specialize single-game prediction to a model and dataset, resolving the cached tables once"""
+    # The closures keep only the resolved tables, never the frame, so this entry is
+    # still dropped when the frame is
+    lookup, defaults = build_feature_lookup(features_df)
+    columns = model_matrix_columns(model)
+    kernels = _get_kernels()
+    if kernels is not None and hasattr(model, 'estimators_') and model.n_outputs_ == 1:
+        forest = build_flat_forest(model)
         
-        manufacturer_encoded = features_df[features_df["manufacturer"] == manufacturer]["manufacturer_encoded"]
-        processed_data["manufacturer_encoded"] = manufacturer_encoded.mean() if not manufacturer_encoded.empty else features_df["manufacturer_encoded"].mean()
+        def predict(game_data):
+            return kernels.predict_flat_forest(*forest, build_feature_row(game_data, lookup, defaults, columns))
+    else:
+        def predict(game_data):
+            return predict_rows(model, build_feature_row(game_data, lookup, defaults, columns).reshape(1, -1))[0]
+    
+    # Repeat submissions and example loads send the same inputs
+    return memoize_by_inputs(predict)
 
-        game_data_df = pd.DataFrame([processed_data])
-        predict_df = game_data_df[model.feature_names_in_]
-        predicted_score = model.predict(predict_df)[0]
+def predict_game_score(game_data: dict, model, features_df):
+    try:
+        predicted_score = build_predictor(model, features_df)(game_data)
 
         return predicted_score, None
     
     except Exception as e:
         return None, f"Prediction error: {str(e)}"
+
+def predict_game_scores(games: list, model, features_df):
+    """Predict several games with a single model call, mapping each feature column at once"""
+    try:
+        lookup, defaults = build_feature_lookup(features_df)
+        game_keys = [feature_lookup_keys(game) for game in games]
+        month = pd.Series([game.get("month", 1) for game in games])
+        
+        # One column per lookup table, keyed exactly as in build_feature_row
+        columns = {
+            feature: pd.Series([keys[feature] for keys in game_keys]).map(lookup[feature]).fillna(defaults[feature])
+            for feature in LOOKUP_FEATURES
+        }
+        columns["metascore_scaled"] = pd.Series([game["metascore"] for game in games]) / 10
+        columns["month"] = month
+        columns["is_holiday_release"] = month.isin([11, 12]).astype(int)
+        
+        rows = pd.DataFrame(columns)[list(model_feature_order(model))].to_numpy(dtype=np.float32)
+        return predict_rows(model, rows), None
+    
+    except Exception as e:
+        return None, f"Prediction error: {str(e)}"
     
-def get_valid_example_values(example_features, developers, platforms, genres):
+def _match_option(value, options, known, lowered=None):
+    """Return value if it is a known option, else the first option containing one of its words"""
+    if value and value in known:
+        return value
+    if not options:
+        return ''
+    # Find similar options or use first available
+    words = value.lower().split()
+    for option, option_lower in zip(options, lowered or (option.lower() for option in options)):
+        if any(word in option_lower for word in words):
+            return option
+    return options[0]
+
+def get_valid_example_values(example_features, developers, platforms, genres, option_sets=None, lowered_options=None):
     """Ensure example values exist in the dataset, provide fallbacks if not"""
     validated = {}
+    # Hash-based membership when the caller has the cached sets, list scans otherwise
+    known_devs, known_plats, known_genres = option_sets or (developers, platforms, genres)
+    lowered_devs, lowered_plats, lowered_genres = lowered_options or (None, None, None)
     
     # Validate and set metascore
     validated['metascore'] = max(0, min(100, example_features.get('metascore', 75)))
@@ -116,48 +371,68 @@ def get_valid_example_values(example_features, developers, platforms, genres):
     month_val = example_features.get('month', 6)
     validated['month'] = month_val if month_val in range(1, 13) else 6
     
-    # Validate developer
-    example_dev = example_features.get('developer', '')
-    if example_dev and developers and example_dev in developers:
-        validated['developer'] = example_dev
-    elif developers:
-        # Find similar developers or use first available
-        similar_devs = [dev for dev in developers if any(word in dev.lower() for word in example_dev.lower().split())]
-        validated['developer'] = similar_devs[0] if similar_devs else developers[0]
-    else:
-        validated['developer'] = ''
-    
-    # Validate platform
-    example_plat = example_features.get('platform', '')
-    if example_plat and platforms and example_plat in platforms:
-        validated['platform'] = example_plat
-    elif platforms:
-        similar_plats = [plat for plat in platforms if any(word in plat.lower() for word in example_plat.lower().split())]
-        validated['platform'] = similar_plats[0] if similar_plats else platforms[0]
-    else:
-        validated['platform'] = ''
-    
-    # Validate genre
-    example_genre = example_features.get('genre', '')
-    if example_genre and genres and example_genre in genres:
-        validated['genre'] = example_genre
-    elif genres:
-        similar_genres = [genre for genre in genres if any(word in genre.lower() for word in example_genre.lower().split())]
-        validated['genre'] = similar_genres[0] if similar_genres else genres[0]
-    else:
-        validated['genre'] = ''
+    # Validate developer, platform and genre
+    validated['developer'] = _match_option(example_features.get('developer', ''), developers, known_devs, lowered_devs)
+    validated['platform'] = _match_option(example_features.get('platform', ''), platforms, known_plats, lowered_plats)
+    validated['genre'] = _match_option(example_features.get('genre', ''), genres, known_genres, lowered_genres)
     
     return validated
 
+def _sorted_options(series):
+    """Sorted distinct values of a column, without a full-column sort"""
+    if isinstance(series.dtype, pd.CategoricalDtype):
+        return series.cat.categories.tolist()
+    return np.sort(pd.unique(series.to_numpy()), kind='quicksort').tolist()
+
+@cache_per_object
 def get_popular_options(df):
-    """Get popular options for dropdowns"""
+    """Get popular options for dropdowns (computed once per dataset)"""
+    options = load_model_options()
+    if options is not None:
+        return options['developers'], options['platforms'], options['genres']
     if df is None:
         return [], [], []
     try:
-        developers = sorted(df['developer'].unique())
-        platforms = sorted(df['platform'].unique())
-        genres = sorted(df['genre'].unique())
+        developers = _sorted_options(df['developer'])
+        platforms = _sorted_options(df['platform'])
+        genres = _sorted_options(df['genre'])
         
         return developers, platforms, genres
     except Exception:
-        return [], [], []
\ No newline at end of file
+        return [], [], []
+
+@cache_per_object
+def compute_insights(df):
+    """Compute the sidebar dataset metrics once per loaded dataset"""
+    return {
+        'total_games': len(df),
+        'average_score': df['metascore'].mean(),
+        'unique_developers': len(df['developer'].cat.categories),
+        'platforms': len(df['platform'].cat.categories),
+    }
+
+@cache_per_object
+def get_option_positions(df):
+    """Map each dropdown option to its index in the lists from get_popular_options"""
+    return tuple({name: idx for idx, name in enumerate(options)} for options in get_popular_options(df))
+
+@cache_per_object
+def get_option_sets(df):
+    """Frozensets of the dropdown options for constant-time membership checks"""
+    return tuple(frozenset(options) for options in get_popular_options(df))
+
+@cache_per_object
+def get_lowered_options(df):
+    """Lowercased dropdown options, aligned with get_popular_options, for example fallback matching"""
+    return tuple([option.lower() for option in options] for options in get_popular_options(df))
+
+@cache_per_object
+def precompute_examples(model, df):
+    """Predict every example game in one batch, as the form would load it"""
+    # Defined here so the cache outlives app.py, which each rerun executes afresh
+    developers, platforms, genres = get_popular_options(df)
+    option_sets = get_option_sets(df)
+    lowered_options = get_lowered_options(df)
+    games = [get_valid_example_values(example['features'], developers, platforms, genres, option_sets, lowered_options) for example in EXAMPLES]
+    scores, error = predict_game_scores(games, model, df)
+    return None if error else scores.tolist()